@@ -0,0 +1,28 @@
+"""
+Kernels de Numba para las conversiones vectorizadas.
+
+Este módulo se mantiene en Python puro aunque kline_timestamp.py se compile con Cython,
+ya que Numba necesita el bytecode de las funciones que compila.
+"""
+from functools import lru_cache
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba es opcional, se usa NumPy como alternativa
+    njit = None
+
+
+@lru_cache(maxsize=None)
+def get_bucket_kernel(tick_ms: int):
+    """
+    Compila un kernel de Numba especializado para un intervalo, con tick_ms fijado como constante.
+    Retorna None si numba no está instalado.
+    """
+    if njit is None:
+        return None
+
+    @njit(cache=True, parallel=True, fastmath=False)
+    def _bucket_kernel(ts_ms, out):
+        for i in prange(ts_ms.shape[0]):
+            out[i] = ts_ms[i] - ts_ms[i] % tick_ms
+    return _bucket_kernel
@@ -1,79 +1,232 @@
+import sys
 from dataclasses import dataclass, field
-from typing import Union
-from datetime import datetime, timedelta, timezone
-import pytz
+from functools import lru_cache
+from types import MappingProxyType
+from typing import ClassVar, Mapping, Sequence, Union
+from datetime import datetime, timedelta, timezone, tzinfo as TzInfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+import numpy as np
 import pandas as pd
 
+from ._kernels import get_bucket_kernel
 
-@dataclass(frozen=True)
-class KlineTimestamp:
+try:
+    import pytz
+except ImportError:  # pytz es opcional, solo se usa si zoneinfo no encuentra la zona
+    pytz = None
+
+# Duración de cada intervalo en milisegundos, compartida por todas las instancias
+_TICK_MS = {
+    '1m': 60 * 1000,
+    '3m': 3 * 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '30m': 30 * 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '2h': 2 * 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '6h': 6 * 60 * 60 * 1000,
+    '8h': 8 * 60 * 60 * 1000,
+    '12h': 12 * 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000,
+    '3d': 3 * 24 * 60 * 60 * 1000,
+    '1w': 7 * 24 * 60 * 60 * 1000
+}
+
+
+def _td_to_ms(td: timedelta) -> int:
+    """
+    Convierte un timedelta a milisegundos con aritmética entera, truncando hacia cero como int(total_seconds() * 1000).
+    """
+    us = (td.days * 86_400 + td.seconds) * 1_000_000 + td.microseconds
+    return us // 1000 if us >= 0 else -(-us // 1000)
+
+
+@lru_cache(maxsize=None)
+def _zone_keys_by_lower() -> dict:
+    """
+    Retorna un mapa de nombres de zona en minúsculas a su nombre IANA, ya que ZoneInfo distingue mayúsculas.
+    """
+    return {key.lower(): key for key in available_timezones()}
+
+
+@lru_cache(maxsize=64)
+def _get_tz(name: str) -> TzInfo:
+    """
+    Resuelve y cachea la zona horaria asociada a un nombre.
+    Lanza ZoneInfoNotFoundError si no se encuentra, esté o no instalado pytz.
+    """
+    if name.upper() == 'UTC':
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        pass
+    key = _zone_keys_by_lower().get(name.lower())
+    if key is not None:
+        return ZoneInfo(key)
+    if pytz is not None:
+        try:
+            return pytz.timezone(name)
+        except pytz.UnknownTimeZoneError:
+            pass
+    raise ZoneInfoNotFoundError(f"No time zone found with key {name}")
+
+
+def _resolve_tz(tzinfo: Union[str, TzInfo]) -> TzInfo:
+    """
+    Retorna el objeto tzinfo correspondiente a un nombre de zona o a un tzinfo ya resuelto.
+    """
+    if isinstance(tzinfo, str):
+        return _get_tz(tzinfo)
+    if isinstance(tzinfo, TzInfo):
+        return tzinfo
+    raise TypeError("tzinfo must be a string or datetime.tzinfo object")
+
+
+def _get_tick_ms(interval: str) -> int:
+    """
+    Retorna la duración en milisegundos del intervalo, validando que esté soportado.
+    """
+    interval = interval.lower()
+    if interval not in _TICK_MS:
+        raise ValueError(f"Invalid interval: {interval}. Valid intervals are: {list(_TICK_MS.keys())}.")
+    return _TICK_MS[interval]
+
+
+# slots=True solo está disponible en dataclasses a partir de Python 3.10
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+class _KlineTimestampBase:
+    """
+    Base con los slots que no son campos del dataclass: __weakref__, que slots=True no incluye por sí solo,
+    y las cachés internas, que así no aparecen en fields() ni en asdict().
+    """
+    __slots__ = ('__weakref__', '_str', '_tz_name')
+
+
+# eq=False: los comparadores se escriben a mano sobre open; los generados por dataclass
+# (order=True) construyen tuplas en cada comparación y resultan más lentos
+@dataclass(frozen=True, eq=False, **_SLOTS)
+class KlineTimestamp(_KlineTimestampBase):
     timestamp_ms: int
     interval: str
-    tzinfo: Union[pytz.BaseTzInfo, str] = 'UTC'
+    tzinfo: Union[TzInfo, str] = 'UTC'
     open: int = field(init=False)
     close: int = field(init=False)
     tick_ms: int = field(init=False, repr=False)  # Declaración del campo tick_ms
 
-    # Definición de tick_milliseconds como campo de clase
-    tick_milliseconds: dict = field(default_factory=lambda: {
-        '1m': 60 * 1000,
-        '3m': 3 * 60 * 1000,
-        '5m': 5 * 60 * 1000,
-        '15m': 15 * 60 * 1000,
-        '30m': 30 * 60 * 1000,
-        '1h': 60 * 60 * 1000,
-        '2h': 2 * 60 * 60 * 1000,
-        '4h': 4 * 60 * 60 * 1000,
-        '6h': 6 * 60 * 60 * 1000,
-        '8h': 8 * 60 * 60 * 1000,
-        '12h': 12 * 60 * 60 * 1000,
-        '1d': 24 * 60 * 60 * 1000,
-        '3d': 3 * 24 * 60 * 60 * 1000,
-        '1w': 7 * 24 * 60 * 60 * 1000
-    }, init=False, repr=False)
+    # Vista de solo lectura de la tabla de intervalos, compartida a nivel de clase
+    tick_milliseconds: ClassVar[Mapping[str, int]] = MappingProxyType(_TICK_MS)
 
     def __post_init__(self):
+        # Solo se convierte cuando no es ya un int de Python (p. ej. escalares de NumPy o pandas)
+        if type(self.timestamp_ms) is not int:
+            object.__setattr__(self, 'timestamp_ms', int(self.timestamp_ms))
         object.__setattr__(self, 'interval', self.interval.lower())
-        if self.interval not in self.tick_milliseconds:
-            raise ValueError(f"Invalid interval: {self.interval}. Valid intervals are: {list(self.tick_milliseconds.keys())}.")
-
-        tick_ms = self.tick_milliseconds[self.interval]
-        open_ts = (self.timestamp_ms // tick_ms) * tick_ms
+        tick_ms = _get_tick_ms(self.interval)
+        open_ts = self.timestamp_ms - self.timestamp_ms % tick_ms
         close_ts = open_ts + tick_ms - 1
         object.__setattr__(self, 'tick_ms', tick_ms)
         object.__setattr__(self, 'open', open_ts)
         object.__setattr__(self, 'close', close_ts)
+        object.__setattr__(self, '_str', None)
 
-        if isinstance(self.tzinfo, str):
-            tz = pytz.timezone(self.tzinfo)
-        elif isinstance(self.tzinfo, pytz.BaseTzInfo):
-            tz = self.tzinfo
-        else:
-            raise TypeError("tzinfo must be a string or pytz.timezone object")
+        tz = _resolve_tz(self.tzinfo)
         object.__setattr__(self, 'tzinfo', tz)
+        object.__setattr__(self, '_tz_name', getattr(tz, 'zone', None) or getattr(tz, 'key', None) or str(tz))
+
+    @staticmethod
+    def _fast_new(timestamp_ms: int, interval: str, tick_ms: int, tzinfo: TzInfo,
+                  tz_name: str) -> 'KlineTimestamp':
+        """
+        Crea una instancia sin validar ni normalizar los argumentos, para uso interno con valores ya resueltos.
+        Siempre crea un KlineTimestamp base, como el constructor original, para no saltarse el
+        __post_init__ de una posible subclase.
+        """
+        obj = object.__new__(KlineTimestamp)
+        open_ts = timestamp_ms - timestamp_ms % tick_ms
+        object.__setattr__(obj, 'timestamp_ms', timestamp_ms)
+        object.__setattr__(obj, 'interval', interval)
+        object.__setattr__(obj, 'tzinfo', tzinfo)
+        object.__setattr__(obj, 'open', open_ts)
+        object.__setattr__(obj, 'close', open_ts + tick_ms - 1)
+        object.__setattr__(obj, 'tick_ms', tick_ms)
+        object.__setattr__(obj, '_str', None)
+        object.__setattr__(obj, '_tz_name', tz_name)
+        return obj
+
+    def get_candle_open_timestamp_ms(self) -> int:
+        """
+        Retorna el timestamp de apertura de la vela en milisegundos.
+        """
+        return self.open
+
+    def get_candle_close_timestamp_ms(self) -> int:
+        """
+        Retorna el timestamp de cierre de la vela en milisegundos.
+        """
+        return self.close
 
     def to_datetime(self) -> datetime:
         """
         Retorna el objeto datetime en la zona horaria proporcionada.
         """
-        dt_utc = datetime.fromtimestamp(self.open / 1000, tz=timezone.utc)
-        dt_local = dt_utc.astimezone(self.tzinfo)
-        return dt_local
+        return datetime.fromtimestamp(self.open / 1000, tz=self.tzinfo)
 
     def to_pandas_timestamp(self) -> pd.Timestamp:
         """
         Retorna un objeto pandas.Timestamp en la zona horaria proporcionada.
         """
-        return pd.Timestamp(self.open, unit='ms', tz='UTC').tz_convert(self.tzinfo)
+        return pd.Timestamp(self.open * 1_000_000, tz=self.tzinfo)
 
-    def with_timezone(self, tzinfo: Union[str, pytz.BaseTzInfo]) -> 'KlineTimestamp':
+    def with_timezone(self, tzinfo: Union[str, TzInfo]) -> 'KlineTimestamp':
         """
         Devuelve una nueva instancia de KlineTimestamp con una zona horaria actualizada.
         """
         return KlineTimestamp(self.timestamp_ms, self.interval, tzinfo)
 
+    @classmethod
+    def opens_from_array(cls, ts_ms: np.ndarray, interval: str) -> np.ndarray:
+        """
+        Retorna los timestamps de apertura en milisegundos para un array de timestamps, de forma vectorizada.
+        """
+        tick_ms = _get_tick_ms(interval)
+        ts_ms = np.asarray(ts_ms).astype(np.int64, copy=False)
+        kernel = get_bucket_kernel(tick_ms)
+        if kernel is None:
+            return ts_ms - ts_ms % tick_ms
+        flat = ts_ms.ravel()
+        out = np.empty_like(flat)
+        kernel(flat, out)
+        return out.reshape(ts_ms.shape)
+
+    @classmethod
+    def to_datetimeindex(cls, ts_ms: np.ndarray, interval: str,
+                         tzinfo: Union[str, TzInfo] = 'UTC') -> pd.DatetimeIndex:
+        """
+        Retorna un pandas.DatetimeIndex con las aperturas de las velas en la zona horaria proporcionada.
+        """
+        tz = _resolve_tz(tzinfo)
+        opens = cls.opens_from_array(ts_ms, interval)
+        return pd.DatetimeIndex(opens.ravel() * 1_000_000, tz=tz)
+
+    @classmethod
+    def to_pandas_index(cls, kts: Sequence['KlineTimestamp']) -> pd.DatetimeIndex:
+        """
+        Retorna un pandas.DatetimeIndex con las aperturas de varias velas en la zona horaria de la primera.
+        Es la alternativa en bloque a llamar a to_pandas_timestamp en cada elemento.
+        """
+        tzinfo = kts[0].tzinfo if len(kts) else timezone.utc
+        opens = np.fromiter((kt.open for kt in kts), dtype=np.int64, count=len(kts))
+        return pd.DatetimeIndex(opens * 1_000_000, tz=tzinfo)
+
     def __str__(self):
-        return f"KlineTimestamp({self.to_datetime().isoformat()}, interval='{self.interval}', tz='{self.tzinfo.zone}')"
+        # La instancia es inmutable, así que la representación se calcula una sola vez
+        if self._str is None:
+            object.__setattr__(self, '_str', f"KlineTimestamp({self.to_datetime().isoformat()}, interval='{self.interval}', tz='{self._tz_name}')")
+        return self._str
 
     def __eq__(self, other: 'KlineTimestamp') -> bool:
         if not isinstance(other, KlineTimestamp):
@@ -103,13 +256,13 @@ class KlineTimestamp:
     def __add__(self, other: timedelta) -> 'KlineTimestamp':
         if not isinstance(other, timedelta):
             raise TypeError(f"Unsupported type for +: 'KlineTimestamp' and '{type(other).__name__}'")
-        new_timestamp_ms = self.timestamp_ms + int(other.total_seconds() * 1000)
-        return KlineTimestamp(new_timestamp_ms, self.interval, self.tzinfo)
+        new_timestamp_ms = self.timestamp_ms + _td_to_ms(other)
+        return self._fast_new(new_timestamp_ms, self.interval, self.tick_ms, self.tzinfo, self._tz_name)
 
     def __sub__(self, other: Union[timedelta, 'KlineTimestamp']) -> Union['KlineTimestamp', timedelta]:
         if isinstance(other, timedelta):
-            new_timestamp_ms = self.timestamp_ms - int(other.total_seconds() * 1000)
-            return KlineTimestamp(new_timestamp_ms, self.interval, self.tzinfo)
+            new_timestamp_ms = self.timestamp_ms - _td_to_ms(other)
+            return self._fast_new(new_timestamp_ms, self.interval, self.tick_ms, self.tzinfo, self._tz_name)
         elif isinstance(other, KlineTimestamp):
             return timedelta(milliseconds=self.timestamp_ms - other.timestamp_ms)
         else:
@@ -120,35 +273,40 @@ class KlineTimestamp:
         Retorna el siguiente KlineTimestamp.
         """
         next_timestamp_ms = self.open + self.tick_ms
-        return KlineTimestamp(next_timestamp_ms, self.interval, self.tzinfo)
+        return self._fast_new(next_timestamp_ms, self.interval, self.tick_ms, self.tzinfo, self._tz_name)
 
     def prev(self) -> 'KlineTimestamp':
         """
         Retorna el KlineTimestamp anterior.
         """
         prev_timestamp_ms = self.open - self.tick_ms
-        return KlineTimestamp(prev_timestamp_ms, self.interval, self.tzinfo)
+        return self._fast_new(prev_timestamp_ms, self.interval, self.tick_ms, self.tzinfo, self._tz_name)
+
+    def __reduce__(self):
+        """
+        Serializa solo los argumentos del constructor; las cachés internas se recalculan al deserializar.
+        """
+        return self.__class__, (self.timestamp_ms, self.interval, self.tzinfo)
 
     def __hash__(self):
         """
-        Genera un hash basado en el timestamp, intervalo y zona horaria para que la clase sea hashable.
+        Genera un hash basado en la apertura de la vela, coherente con __eq__, para que la clase sea hashable.
         """
-        return hash((self.timestamp_ms, self.interval, self.tzinfo.zone))
+        return hash(self.open)
 
 
 if __name__ == '__main__':
     from datetime import timedelta
-    import pytz
 
     # Crear una instancia de kline_timestamp
     kt = KlineTimestamp(timestamp_ms=1633036800000, interval='1h', tzinfo='Europe/Madrid')
 
     # Probar get_candle_open_timestamp_ms
-    open_ts_ms = kt.open
+    open_ts_ms = kt.get_candle_open_timestamp_ms()
     print(f"Open timestamp (ms): {open_ts_ms}")
 
     # Probar get_candle_close_timestamp_ms
-    close_ts_ms = kt.close
+    close_ts_ms = kt.get_candle_close_timestamp_ms()
     print(f"Close timestamp (ms): {close_ts_ms}")
 
     # open and close as attributes
@@ -1,6 +1,15 @@
-from setuptools import setup, find_packages
+import os
+from setuptools import setup, find_packages, Extension
 from pathlib import Path
 
+# La compilación con Cython es opcional y explícita: solo se intenta con KLINE_TIMESTAMP_CYTHON=1
+cythonize = None
+if os.environ.get("KLINE_TIMESTAMP_CYTHON") == "1":
+    try:
+        from Cython.Build import cythonize
+    except ImportError:
+        pass
+
 # Obtener el directorio donde se encuentra setup.py
 this_directory = Path(__file__).parent
 
@@ -14,6 +23,18 @@ requirements_path = this_directory / "requirements.txt"
 with open(requirements_path, encoding="utf-8") as f:
     required_packages = f.read().splitlines()
 
+# optional=True permite que la instalación continúe en Python puro si falla la compilación en C;
+# annotation_typing=False evita que las anotaciones se conviertan en comprobaciones de tipo exacto
+ext_modules = []
+if cythonize is not None:
+    try:
+        ext_modules = cythonize(
+            [Extension("kline_timestamp.kline_timestamp", ["kline_timestamp/kline_timestamp.py"], optional=True)],
+            compiler_directives={'language_level': 3, 'annotation_typing': False},
+        )
+    except Exception:
+        ext_modules = []
+
 setup(
     name="kline_timestamp",  # Nombre del paquete en minúsculas
     version="0.1.6",
@@ -26,11 +47,13 @@ setup(
     packages=find_packages(),
     include_package_data=True,  # Asegura que se respete MANIFEST.in
     install_requires=required_packages,
+    extras_require={'numba': ['numba']},  # Acelera las conversiones vectorizadas
+    ext_modules=ext_modules,
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.9',
     exclude_package_data={'': ['*.ipynb', '*.ipynb_checkpoints/*']},  # Exclusión de notebooks y checkpoints
 )